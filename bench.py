@@ -0,0 +1,225 @@
+""" Benchmarks of the search engine; they are run by the bench subcommand of persian_search.py """
+import random
+import subprocess
+import sys
+from importlib import import_module
+from os import path
+from statistics import median
+from time import perf_counter
+
+from corpus import calculate_norms, calculate_weights, collect_docs, count_terms, get_document_frequencies, \
+    get_query_weights, get_top_k, read_terms
+from daat import TermBlocks, get_top_k_daat
+from disk_index import DiskIndex, build_index
+from near_duplicates import NearDuplicateDetector
+from query_executor import QueryExecutor, wait_results
+
+QUERIES = ["تاریخ ایران باستان", "ریاضیات هندسه", "بیماری قلب", "فیزیک کوانتوم انرژی", "فناوری اطلاعات رایانه"]
+CLI = path.join(path.dirname(path.abspath(__file__)), "persian_search.py")
+
+
+def bench_startup(index_dir: str, runs: int):
+    """
+    measures time from starting the query subcommand to answer of first query in a new interpreter
+    and the slowest imports of startup reported by python -X importtime
+    """
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run([sys.executable, CLI, "query", "--index", index_dir], input=QUERIES[0] + "\n۰۰۰\n",
+                       capture_output=True, check=True, encoding='utf-8')
+        times.append(perf_counter() - start)
+
+    print("time to first query: median %.1f ms, min %.1f ms" % (median(times) * 1000, min(times) * 1000))
+
+    # each line of importtime is: import time: self [us] | cumulative | imported package
+    result = subprocess.run([sys.executable, "-X", "importtime", CLI, "query", "--index", index_dir],
+                            input=QUERIES[0] + "\n۰۰۰\n", capture_output=True, check=True, encoding='utf-8')
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].rstrip()))
+
+    print("import time: %.1f ms" % (sum(t for t, name in imports if not name.startswith("  ")) / 1000))
+    for t, name in sorted(imports, reverse=True)[:5]:
+        print("    %.1f ms %s" % (t / 1000, name.strip()))
+
+
+def bench_query(index_dir: str, runs: int):
+    """
+    measures latency of queries on a disk index; first run of each query also reads its postings from disk
+    """
+    index = DiskIndex(index_dir)
+    times = []
+    for _ in range(runs):
+        for q in QUERIES:
+            start = perf_counter()
+            index.search(q, 5)
+            times.append(perf_counter() - start)
+    index.close()
+
+    print("query latency: median %.3f ms, max %.3f ms" % (median(times) * 1000, max(times) * 1000))
+
+
+def bench_snippets(index_dir: str, runs: int):
+    """
+    measures time of making snippet of each result doc of queries
+    """
+    index = DiskIndex(index_dir)
+    times = []
+    for _ in range(runs):
+        for q in QUERIES:
+            for _, d in index.search(q, 5):
+                start = perf_counter()
+                index.get_snippet(d, q)
+                times.append(perf_counter() - start)
+    index.close()
+
+    print("snippet time: median %.3f ms, max %.3f ms" % (median(times) * 1000, max(times) * 1000))
+
+
+def bench_near_duplicates(docs_dir: str, runs: int):
+    """
+    measures throughput of near-duplicate detection of docs; reading and stemming docs is not measured
+    """
+    docs_terms = [read_terms(d) for d in collect_docs(docs_dir)]
+    times = []
+    for _ in range(runs):
+        detector = NearDuplicateDetector()
+        start = perf_counter()
+        for doc_no in range(1, len(docs_terms) + 1):
+            detector.add(doc_no, docs_terms[doc_no - 1])
+        times.append(perf_counter() - start)
+
+    print("near-duplicate detection: %.0f docs/s, %d near-duplicates" %
+          (len(docs_terms) / median(times), len(detector.duplicates)))
+
+
+def bench_executor(index_dir: str, runs: int):
+    """
+    measures throughput of concurrent query evaluation with 1 to 4 thread and process workers;
+    loading snapshots of index is not measured
+    """
+    queries = QUERIES * 100
+    for use_processes in [False, True]:
+        for workers in [1, 2, 4]:
+            executor = QueryExecutor(index_dir, workers, use_processes)
+            wait_results(executor.map(QUERIES * workers, 5))  # workers load their snapshots
+
+            times = []
+            for _ in range(runs):
+                start = perf_counter()
+                wait_results(executor.map(queries, 5))
+                times.append(perf_counter() - start)
+            executor.close()
+
+            print("%s %d workers: %.0f queries/s" %
+                  ("processes" if use_processes else "threads", workers, len(queries) / median(times)))
+
+
+def create_scaled_index(docs_dir: str, scale: int):
+    """
+    creates an in-memory index of scale times more docs than docs_dir; each doc is a random part of a doc of docs_dir
+    :return: number of docs, document frequencies, weighted postings and norms (indexed by doc no)
+    """
+    docs_terms = [read_terms(d) for d in collect_docs(docs_dir)]
+    rand = random.Random(0)
+
+    postings: dict[str, list[(int, int)]] = {}
+    docs_num = len(docs_terms) * scale
+    for doc_no in range(1, docs_num + 1):
+        terms = docs_terms[rand.randrange(len(docs_terms))]
+        n = rand.randint(1, max(1, len(terms)))
+        start = rand.randrange(len(terms) - n + 1) if len(terms) > 0 else 0
+        count_terms(postings, doc_no, terms[start:start + n])
+
+    weighted_postings = calculate_weights(postings, get_document_frequencies(postings), docs_num)
+    norms = calculate_norms(weighted_postings)
+
+    return docs_num, {t: len(p) for t, p in weighted_postings.items()}, weighted_postings, \
+        [norms.get(d, 0.0) for d in range(docs_num + 1)]
+
+
+def bench_daat(docs_dir: str, runs: int, scale: int = 16):
+    """
+    compares query evaluation of 2.py (dense vectors of champion docs, r = 6), exhaustive term-at-a-time search and
+    document-at-a-time search with block-max skipping on a scaled index;
+    recall is share of exact k best docs in results; exact k best docs of conjunctive search are k best docs of
+    exhaustive search that include all of query terms
+    """
+    k = 5
+    docs_num, df, weighted_postings, norms = create_scaled_index(docs_dir, scale)
+    term_blocks = {t: TermBlocks(p, norms) for t, p in weighted_postings.items()}
+
+    rand = random.Random(1)
+    vocabulary = sorted(df)
+    queries = QUERIES + [" ".join(rand.choice(vocabulary) for _ in range(rand.randint(2, 4))) for _ in range(15)]
+    queries_weights = [w for w in (get_query_weights(q, df, docs_num) for q in queries) if len(w) > 0]
+    exact = [set(d for _, d in get_top_k(weighted_postings, norms, qw, k)) for qw in queries_weights]
+    exact_and = []
+    for qw in queries_weights:
+        docs = set.intersection(*(set(d for d, _ in weighted_postings[t]) for t in qw))
+        exact_and.append(set([d for _, d in get_top_k(weighted_postings, norms, qw, docs_num) if d in docs][:k]))
+
+    evaluators = [
+        ("term-at-a-time", lambda qw: get_top_k(weighted_postings, norms, qw, k), exact),
+        ("daat or", lambda qw: get_top_k_daat(term_blocks, qw, k), exact),
+        ("daat and", lambda qw: get_top_k_daat(term_blocks, qw, k, True), exact_and),
+    ]
+    for name, evaluate, exact_results in evaluators:
+        times = []
+        found = 0
+        for _ in range(runs):
+            start = perf_counter()
+            for i in range(len(queries_weights)):
+                found += len(exact_results[i] & set(d for _, d in evaluate(queries_weights[i])))
+            times.append(perf_counter() - start)
+
+        # queries without any doc that includes all of their terms have no exact results
+        print("%s on %d docs: %.3f ms/query, recall %.2f" %
+              (name, docs_num, median(times) / len(queries_weights) * 1000,
+               found / runs / max(1, sum(len(e) for e in exact_results))))
+
+    # 2.py scores vectors over the whole dictionary, so vectors of champion docs of each query are made before timing
+    get_results = import_module("2").get_results
+    terms = {t: i for i, t in enumerate(vocabulary)}
+    champion_lists = {t: [d for _, d in sorted(((w, d) for d, w in p), reverse=True)[:6]]
+                      for t, p in weighted_postings.items()}
+    doc_weights: dict[int, list[(int, float)]] = {}
+    for t, p in weighted_postings.items():
+        for d, w in p:
+            doc_weights.setdefault(d, []).append((terms[t], w))
+
+    total_time = 0.0
+    found = 0
+    for i in range(len(queries_weights)):
+        query_vector = [0.0] * len(vocabulary)
+        for t, qw in queries_weights[i].items():
+            query_vector[terms[t]] = qw
+
+        query_doc_vectors = []
+        for d in {d for t in queries_weights[i] for d in champion_lists[t]}:
+            doc_vector = [0.0] * len(vocabulary)
+            for t, w in doc_weights[d]:
+                doc_vector[t] = w
+            query_doc_vectors.append((doc_vector, d))
+
+        start = perf_counter()
+        found += len(exact[i] & set(get_results(query_doc_vectors, query_vector, k)))
+        total_time += perf_counter() - start
+
+    print("2.py on %d docs: %.3f ms/query, recall %.2f" %
+          (docs_num, total_time / len(queries_weights) * 1000, found / sum(len(e) for e in exact)))
+
+
+def run_benchmarks(args):
+    if not path.exists(args.index):
+        build_index(args.docs, args.index)
+
+    bench_startup(args.index, args.runs)
+    bench_query(args.index, args.runs)
+    bench_snippets(args.index, args.runs)
+    bench_near_duplicates(args.docs, args.runs)
+    bench_executor(args.index, args.runs)
+    bench_daat(args.docs, args.runs)
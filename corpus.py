@@ -0,0 +1,193 @@
+""" Shared helpers for collecting, tokenizing and weighting the Persian docs of the search engine """
+import heapq
+import re
+from glob import glob
+from importlib import import_module
+from math import log10, sqrt
+from os import path, scandir
+from time import monotonic
+
+stemming = import_module("2").stemming  # file name of 2.py is not a valid identifier for a plain import
+
+
+def collect_docs(root: str):
+    """
+    collects address of all docs in root folder; docs are either directly in root (like SampleDocs1)
+    or in numbered cluster folders (like SampleDocs2)
+    :param root: address of docs folder
+    :return: list of address of docs; doc no of each doc is its index plus one
+    """
+    clusters = sorted((e.name for e in scandir(root) if e.is_dir() and e.name.isdigit()), key=int)
+    if len(clusters) == 0:
+        return sorted(glob(path.join(root, "*.txt")), key=lambda d: int(path.basename(d)[:-4]))
+
+    docs = []
+    for c in clusters:
+        docs.extend(sorted(glob(path.join(root, c, "*.txt"))))
+
+    return docs
+
+
+def get_doc_name(doc: str):
+    """
+    :return: name of doc without its folder and extension
+    """
+    return path.basename(doc)[:-4]
+
+
+def read_tokens(doc: str):
+    """
+    reads a doc and stems its words
+    :param doc: address of doc
+    :return: text of doc and list of (start, end, stemmed word) of its non-empty stemmed words in order
+    """
+    with open(doc, "r", encoding='utf-8') as f:
+        text = f.read()
+
+    tokens = []
+    for m in re.finditer("\\S+", text):
+        stemmed_word = stemming(m.group())
+        if not stemmed_word == "":  # check if there is a non-empty string as stemmed word
+            tokens.append((m.start(), m.end(), stemmed_word))
+
+    return text, tokens
+
+
+def read_terms(doc: str):
+    """
+    reads a doc and stems its words
+    :param doc: address of doc
+    :return: list of non-empty stemmed words of doc in order
+    """
+    return [t for _, _, t in read_tokens(doc)[1]]
+
+
+def count_terms(postings: dict[str, list[(int, int)]], doc_no: int, terms: list[str]):
+    """
+    adds tf of terms of a doc to postings
+    :param postings: a dictionary from term to list of (doc no, tf); docs must be added in ascending doc no
+    :param doc_no: number of doc
+    :param terms: stemmed words of doc
+    """
+    tf: dict[str, int] = {}
+    for t in terms:
+        tf[t] = tf.get(t, 0) + 1
+
+    for t, n in tf.items():
+        postings.setdefault(t, []).append((doc_no, n))
+
+
+def get_document_frequencies(postings: dict[str, list[(int, int)]]):
+    """
+    :return: a dictionary from term to number of docs that include that term
+    """
+    return {t: len(p) for t, p in postings.items()}
+
+
+def is_over_repeated(word: str, df: int, docs_num: int):
+    """
+    same rule as remove_over_repeated_words: words that there are in more than %70 of all docs and their lengths are
+    less than 5 are eliminated from index
+    """
+    return not (df < docs_num * 0.7 or len(word) >= 5)
+
+
+def get_weight(tf: int, df: int, docs_num: int):
+    """
+    :return: tf-idf weight of a term in a doc
+    """
+    return (1 + log10(tf)) * log10(docs_num / df)
+
+
+def calculate_weights(postings: dict[str, list[(int, int)]], df: dict[str, int], docs_num: int):
+    """
+    calculates weights of terms with (maybe global) document frequencies and eliminates over repeated words
+    :param postings: a dictionary from term to list of (doc no, tf)
+    :param df: document frequency of terms; may be gathered from several shards
+    :param docs_num: number of all indexed docs
+    :return: a dictionary from term to list of (doc no, weight)
+    """
+    weighted_postings: dict[str, list[(int, float)]] = {}
+    for t, p in postings.items():
+        if not is_over_repeated(t, df[t], docs_num):
+            weighted_postings[t] = [(d, get_weight(tf, df[t], docs_num)) for d, tf in p]
+
+    return weighted_postings
+
+
+def calculate_norms(weighted_postings: dict[str, list[(int, float)]]):
+    """
+    :return: a dictionary from doc no to length of its vector
+    """
+    sum_w2: dict[int, float] = {}
+    for p in weighted_postings.values():
+        for d, w in p:
+            sum_w2[d] = sum_w2.get(d, 0) + w * w
+
+    return {d: sqrt(s) for d, s in sum_w2.items()}
+
+
+def get_query_weights(q: str, df: dict[str, int], docs_num: int):
+    """
+    calculates query vector only due to idf of each term in query in dictionary, the same as 2.py
+    :param df: document frequency of terms of dictionary
+    :return: a dictionary from query term to its weight
+    """
+    query_weights: dict[str, float] = {}
+    for w in q.split():
+        sw = stemming(w)
+        if sw in df:
+            query_weights[sw] = docs_num / df[sw]
+
+    return query_weights
+
+
+def get_top_k(weighted_postings: dict[str, list[(int, float)]], norms: dict[int, float],
+              query_weights: dict[str, float], k: int, deadline: float = None):
+    """
+    calculates cosine similarity of query with all docs that include at least one of query terms
+    :param query_weights: a dictionary from query term to its weight
+    :param k: number of results
+    :param deadline: time (as time.monotonic()) that TimeoutError is raised after it, before next term is scored
+    (optional)
+    :return: list of k best (similarity, doc no), best match first
+    """
+    scores: dict[int, float] = {}
+    for t, qw in query_weights.items():
+        if deadline is not None and monotonic() > deadline:
+            raise TimeoutError("deadline of query is passed")
+
+        for d, w in weighted_postings.get(t, []):
+            scores[d] = scores.get(d, 0) + w * qw
+
+    query_norm = sqrt(sum(qw * qw for qw in query_weights.values()))
+    similarities = ((s / (norms[d] * query_norm), d) for d, s in scores.items() if s != 0)
+
+    return heapq.nlargest(k, similarities, key=lambda x: (x[0], -x[1]))
+
+
+def create_index(docs: list[str], doc_store=None, detector=None):
+    """
+    creates a weighted index from docs in memory
+    :param docs: address of all docs; doc no of each doc is its index plus one
+    :param doc_store: a DocStoreWriter that text and tokens of docs are added to (optional)
+    :param detector: a NearDuplicateDetector; near-duplicates of earlier docs are not indexed (optional)
+    :return: number of indexed docs (without near-duplicates), document frequencies of dictionary terms,
+    weighted postings and norms of doc vectors
+    """
+    postings: dict[str, list[(int, int)]] = {}
+    for doc_no, doc in enumerate(docs, 1):
+        text, tokens = read_tokens(doc)
+        if doc_store is not None:
+            doc_store.add_doc(text, tokens)
+
+        terms = [t for _, _, t in tokens]
+        if detector is None or detector.add(doc_no, terms) is None:
+            count_terms(postings, doc_no, terms)
+
+    # near-duplicates are not counted in idf and index elimination
+    docs_num = len(docs) - (0 if detector is None else len(detector.duplicates))
+    weighted_postings = calculate_weights(postings, get_document_frequencies(postings), docs_num)
+    df = {t: len(p) for t, p in weighted_postings.items()}
+
+    return docs_num, df, weighted_postings, calculate_norms(weighted_postings)
@@ -0,0 +1,206 @@
+""" Document-at-a-time evaluation of exact top-k with block-max skipping """
+import heapq
+from bisect import bisect_left
+from math import sqrt
+
+BLOCK_SIZE = 64  # number of postings of each block
+
+
+class TermBlocks:
+    """
+    Term Blocks class contains postings of a term with weights divided by length of doc vectors, so similarity of a
+    doc is sum of its normalized weights times query weights, and maximum normalized weight of each block of postings
+    """
+
+    def __init__(self, postings: list[(int, float)], norms):
+        self.doc_nos: list[int] = [d for d, _ in postings]
+        self.weights: list[float] = [w / norms[d] if norms[d] != 0 else 0.0 for d, w in postings]
+        self.last_docs: list[int] = []  # last doc no of each block
+        self.max_weights: list[float] = []  # maximum normalized weight of each block
+        for i in range(0, len(postings), BLOCK_SIZE):
+            self.last_docs.append(self.doc_nos[min(i + BLOCK_SIZE, len(postings)) - 1])
+            self.max_weights.append(max(self.weights[i:i + BLOCK_SIZE]))
+
+
+class Cursor:
+    """
+    Cursor class iterates over postings of a query term in ascending doc no
+    """
+
+    def __init__(self, blocks: TermBlocks, query_weight: float):
+        self.blocks = blocks
+        self.query_weight = query_weight
+        self.max_score = max(blocks.max_weights) * query_weight
+        self.position = 0
+        self.doc = blocks.doc_nos[0]
+
+    def next(self):
+        self.move(self.position + 1)
+
+    def next_geq(self, doc_no: int):
+        """
+        moves cursor to first posting whose doc no is at least doc_no; blocks that end before doc_no are skipped
+        """
+        if self.doc is None or doc_no <= self.doc:
+            return
+
+        block = bisect_left(self.blocks.last_docs, doc_no, self.position // BLOCK_SIZE)
+        if block == len(self.blocks.last_docs):
+            self.move(len(self.blocks.doc_nos))
+        else:
+            end = min((block + 1) * BLOCK_SIZE, len(self.blocks.doc_nos))
+            self.move(bisect_left(self.blocks.doc_nos, doc_no, max(self.position, block * BLOCK_SIZE), end))
+
+    def move(self, position: int):
+        self.position = position
+        self.doc = self.blocks.doc_nos[position] if position < len(self.blocks.doc_nos) else None
+
+    def score(self):
+        return self.blocks.weights[self.position] * self.query_weight
+
+    def block_max_score(self):
+        return self.blocks.max_weights[self.position // BLOCK_SIZE] * self.query_weight
+
+    def block_last_doc(self):
+        return self.blocks.last_docs[self.position // BLOCK_SIZE]
+
+
+def push(top_k: list[(float, int)], k: int, score: float, doc_no: int):
+    """
+    adds a doc to the min-heap of k best docs; docs are pushed in ascending doc no so a doc with the same score as
+    the worst of k best docs is worse than it; docs with zero score are not results, the same as get_top_k
+    """
+    if score == 0:
+        return
+
+    if len(top_k) < k:
+        heapq.heappush(top_k, (score, -doc_no))
+    elif score > top_k[0][0]:
+        heapq.heapreplace(top_k, (score, -doc_no))
+
+
+def get_threshold(top_k: list[(float, int)], k: int):
+    """
+    :return: score that a doc must be more than to enter k best docs
+    """
+    return top_k[0][0] if len(top_k) == k else 0.0
+
+
+def search_or(cursors: list[Cursor], k: int):
+    """
+    finds k best docs that include any of query terms with block-max MaxScore: terms whose maximum scores together
+    are not more than the threshold are non-essential, so only docs of essential terms are candidates;
+    blocks of essential terms whose maximum scores with non-essential terms are not more than the threshold are
+    skipped and non-essential terms are looked up only while they can make a candidate enter k best docs
+    :return: min-heap of k best (sum of scores, -doc no)
+    """
+    top_k = []
+    cursors = sorted((c for c in cursors if c.doc is not None), key=lambda c: c.max_score)
+
+    # upper_bounds[i] is sum of maximum scores of cursors before i
+    upper_bounds = [0.0]
+    for c in cursors:
+        upper_bounds.append(upper_bounds[-1] + c.max_score)
+
+    essential = 0  # cursors from this index are essential
+    threshold = 0.0
+    heap = [(c.doc, i) for i, c in enumerate(cursors)]  # current doc of essential cursors
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        doc_no = heap[0][0]
+        at_doc_indexes = []
+        while len(heap) > 0 and heap[0][0] == doc_no:
+            at_doc_indexes.append(heapq.heappop(heap)[1])
+        at_doc = [cursors[i] for i in at_doc_indexes]
+
+        upper_bound = upper_bounds[essential]
+        for c in at_doc:
+            upper_bound += c.block_max_score()
+
+        if upper_bound <= threshold:
+            # docs before end of the first ending block can only include these essential terms
+            next_doc = min(c.block_last_doc() for c in at_doc) + 1
+            if len(heap) > 0 and heap[0][0] < next_doc:
+                next_doc = heap[0][0]
+            for c in at_doc:
+                c.next_geq(next_doc)
+        else:
+            score = 0.0
+            for c in at_doc:
+                score += c.score()
+                c.next()
+
+            for i in range(essential - 1, -1, -1):
+                if score + upper_bounds[i + 1] <= threshold:
+                    break
+
+                c = cursors[i]
+                c.next_geq(doc_no)
+                if c.doc == doc_no:
+                    score += c.score()
+
+            push(top_k, k, score, doc_no)
+
+        for i in at_doc_indexes:
+            if cursors[i].doc is not None:
+                heapq.heappush(heap, (cursors[i].doc, i))
+
+        # cursors become non-essential only when threshold rises
+        if get_threshold(top_k, k) > threshold:
+            threshold = get_threshold(top_k, k)
+            old_essential = essential
+            while essential < len(cursors) and upper_bounds[essential + 1] <= threshold:
+                essential += 1
+            if essential > old_essential:
+                heap = [(d, i) for d, i in heap if i >= essential]
+                heapq.heapify(heap)
+
+    return top_k
+
+
+def search_and(cursors: list[Cursor], k: int):
+    """
+    finds k best docs that include all of query terms; a doc is scored only if sum of maximum scores of current blocks
+    of its terms is more than the threshold, otherwise all docs before end of the first ending block are skipped
+    :return: min-heap of k best (sum of scores, -doc no)
+    """
+    top_k = []
+    if len(cursors) == 0 or any(c.doc is None for c in cursors):
+        return top_k
+
+    cursors = sorted(cursors, key=lambda c: len(c.blocks.doc_nos))  # shortest postings lead
+    doc_no = cursors[0].doc
+    while True:
+        # moving all cursors to the first doc that is at least doc_no and includes all terms
+        for c in cursors:
+            c.next_geq(doc_no)
+            if c.doc is None:
+                return top_k
+            if c.doc > doc_no:
+                doc_no = c.doc
+                break
+        else:
+            if sum(c.block_max_score() for c in cursors) > get_threshold(top_k, k):
+                push(top_k, k, sum(c.score() for c in cursors), doc_no)
+                doc_no += 1
+            else:
+                doc_no = min(c.block_last_doc() for c in cursors) + 1
+
+
+def get_top_k_daat(term_blocks: dict[str, TermBlocks], query_weights: dict[str, float], k: int,
+                   conjunctive: bool = False):
+    """
+    calculates exact k best docs of a query document-at-a-time; same results as get_top_k for disjunctive queries
+    :param term_blocks: postings of query terms
+    :param query_weights: a dictionary from query term to its weight
+    :param conjunctive: only docs that include all of query terms are results
+    :return: list of k best (similarity, doc no), best match first
+    """
+    cursors = [Cursor(term_blocks[t], qw) for t, qw in query_weights.items() if len(term_blocks[t].doc_nos) > 0]
+    if conjunctive and len(cursors) < len(query_weights):
+        return []
+
+    top_k = search_and(cursors, k) if conjunctive else search_or(cursors, k)
+
+    query_norm = sqrt(sum(qw * qw for qw in query_weights.values()))
+    return [(s / query_norm, -d) for s, d in sorted(top_k, reverse=True)]
@@ -0,0 +1,221 @@
+""" Prebuilt on-disk index that is loaded lazily: dictionary first, postings of each term on first touch """
+import pickle
+from array import array
+from os import makedirs, path
+
+from corpus import collect_docs, create_index, get_query_weights, get_top_k, stemming
+from daat import TermBlocks, get_top_k_daat
+from doc_store import DocStore, DocStoreWriter
+
+DICTIONARY_FILE = "dictionary.pickle"
+POSTINGS_FILE = "postings.bin"
+NORMS_FILE = "norms.bin"
+DOCS_FILE = "docs.txt"
+
+
+def write_index(directory: str, docs: list[str], docs_num: int, df: dict[str, int],
+                weighted_postings: dict[str, list[(int, float)]], norms: dict[int, float]):
+    """
+    writes an index to directory; postings of each term are doc nos followed by weights
+    :param docs: address of all docs; doc no of each doc is its index plus one
+    :param docs_num: number of indexed docs; it is less than number of docs if near-duplicates are not indexed
+    :param df: document frequency of terms of dictionary (after index elimination)
+    :param weighted_postings: a dictionary from term to list of (doc no, weight)
+    :param norms: a dictionary from doc no to length of its vector
+    """
+    makedirs(directory, exist_ok=True)
+
+    offsets: dict[str, int] = {}
+    with open(path.join(directory, POSTINGS_FILE), "wb") as f:
+        for t in sorted(weighted_postings):
+            offsets[t] = f.tell()
+            write_postings(f, weighted_postings[t])
+
+    write_dictionary(directory, docs, docs_num, df, offsets,
+                     array('d', [norms.get(d, 0.0) for d in range(len(docs) + 1)]))
+
+
+def write_dictionary(directory: str, docs: list[str], docs_num: int, df: dict[str, int], offsets: dict[str, int],
+                     norms: array):
+    """
+    writes dictionary, norms and docs of an index whose postings are written
+    :param docs_num: number of indexed docs
+    :param offsets: a dictionary from term to position of its postings in postings file
+    :param norms: length of doc vectors; index of each doc is its doc no
+    """
+    with open(path.join(directory, DICTIONARY_FILE), "wb") as f:
+        pickle.dump((docs_num, df, offsets), f, pickle.HIGHEST_PROTOCOL)
+
+    with open(path.join(directory, NORMS_FILE), "wb") as f:
+        norms.tofile(f)
+
+    with open(path.join(directory, DOCS_FILE), "w", encoding='utf-8') as f:
+        f.writelines(d + "\n" for d in docs)
+
+
+def build_index(docs_dir: str, directory: str, detector=None):
+    """
+    indexes docs of docs_dir and writes the index and the forward index of docs to directory
+    :param detector: a NearDuplicateDetector; near-duplicates of earlier docs are not indexed (optional)
+    :return: number of indexed docs
+    """
+    docs = collect_docs(docs_dir)
+    doc_store = DocStoreWriter(directory)
+    try:
+        docs_num, df, weighted_postings, norms = create_index(docs, doc_store, detector)
+        write_index(directory, docs, docs_num, df, weighted_postings, norms)
+    finally:
+        doc_store.close()
+
+    return docs_num
+
+
+def write_postings(f, postings: list[(int, float)]):
+    """
+    writes postings of a term to an open binary file
+    :param postings: list of (doc no, weight) in ascending doc no
+    """
+    array('i', [d for d, _ in postings]).tofile(f)
+    array('d', [w for _, w in postings]).tofile(f)
+
+
+def read_postings(f, offset: int, n: int):
+    """
+    reads postings of a term from an open binary file
+    :param offset: position of postings in file
+    :param n: number of postings (document frequency of term)
+    :return: list of (doc no, weight)
+    """
+    doc_nos = array('i')
+    weights = array('d')
+    f.seek(offset)
+    doc_nos.fromfile(f, n)
+    weights.fromfile(f, n)
+
+    return list(zip(doc_nos, weights))
+
+
+class DiskIndex:
+    """
+    Disk Index class reads only the dictionary when it is opened; postings, norms and docs are read when needed
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(path.join(directory, DICTIONARY_FILE), "rb") as f:
+            self.docs_num, self.df, self.offsets = pickle.load(f)
+
+        self.postings_file = None
+        self.postings_cache: dict[str, list[(int, float)]] = {}
+        self.blocks_cache: dict[str, TermBlocks] = {}
+        self._norms = None
+        self._docs = None
+        self._doc_store = None
+
+    @property
+    def norms(self):
+        """
+        length of doc vectors; index of each doc is its doc no
+        """
+        if self._norms is None:
+            self._norms = array('d')
+            with open(path.join(self.directory, NORMS_FILE), "rb") as f:
+                self._norms.frombytes(f.read())
+
+        return self._norms
+
+    @property
+    def docs(self):
+        """
+        address of all docs; doc no of each doc is its index plus one
+        """
+        if self._docs is None:
+            with open(path.join(self.directory, DOCS_FILE), "r", encoding='utf-8') as f:
+                self._docs = [line.rstrip('\n') for line in f]
+
+        return self._docs
+
+    @property
+    def doc_store(self):
+        """
+        forward index of docs that is used for snippets
+        """
+        if self._doc_store is None:
+            self._doc_store = DocStore(self.directory)
+
+        return self._doc_store
+
+    def get_postings(self, term: str):
+        """
+        :return: list of (doc no, weight) of term, empty list if term is not in dictionary
+        """
+        if term not in self.offsets:
+            return []
+
+        if term not in self.postings_cache:
+            if self.postings_file is None:
+                self.postings_file = open(path.join(self.directory, POSTINGS_FILE), "rb")
+            self.postings_cache[term] = read_postings(self.postings_file, self.offsets[term], self.df[term])
+
+        return self.postings_cache[term]
+
+    def get_term_blocks(self, term: str):
+        """
+        :return: postings of term with normalized weights and maximum weight of each block, that are used by DAAT search
+        """
+        if term not in self.blocks_cache:
+            self.blocks_cache[term] = TermBlocks(self.get_postings(term), self.norms)
+
+        return self.blocks_cache[term]
+
+    def load_all(self):
+        """
+        reads all postings, norms and docs; after that the index is not changed by searching and it can be shared
+        between threads as a read-only snapshot
+        """
+        for t in self.offsets:
+            self.get_postings(t)
+        _ = self.norms, self.docs
+        self.close()
+
+    def search(self, q: str, k: int, deadline: float = None):
+        """
+        :param q: the query
+        :param k: number of results
+        :param deadline: time (as time.monotonic()) that TimeoutError is raised after it (optional)
+        :return: list of k best (similarity, doc no)
+        """
+        query_weights = get_query_weights(q, self.df, self.docs_num)
+        if len(query_weights) == 0:
+            return []
+
+        return get_top_k({t: self.get_postings(t) for t in query_weights}, self.norms, query_weights, k, deadline)
+
+    def search_daat(self, q: str, k: int, conjunctive: bool = False):
+        """
+        finds exact k best docs document-at-a-time with block-max skipping
+        :param q: the query
+        :param k: number of results
+        :param conjunctive: only docs that include all of query terms are results
+        :return: list of k best (similarity, doc no)
+        """
+        query_weights = get_query_weights(q, self.df, self.docs_num)
+        if len(query_weights) == 0:
+            return []
+
+        return get_top_k_daat({t: self.get_term_blocks(t) for t in query_weights}, query_weights, k, conjunctive)
+
+    def get_snippet(self, doc_no: int, q: str, highlight=("\033[1m", "\033[0m")):
+        """
+        :param highlight: strings that are put before and after each query term
+        :return: snippet of doc with highlighted query terms
+        """
+        return self.doc_store.get_snippet(doc_no, {stemming(w) for w in q.split()}, highlight)
+
+    def close(self):
+        if self.postings_file is not None:
+            self.postings_file.close()
+            self.postings_file = None
+        if self._doc_store is not None:
+            self._doc_store.close()
+            self._doc_store = None
@@ -0,0 +1,166 @@
+""" Forward index of docs: compressed text blocks and token offsets that are used for snippets and highlighting """
+import heapq
+import pickle
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import islice, repeat
+from os import makedirs, path
+
+STORE_FILE = "store.bin"
+STORE_DICTIONARY_FILE = "store.pickle"
+BLOCK_SIZE = 2048  # number of characters of each text block
+MAX_MATCHES = 1000  # only first matches of query terms in a doc are looked at to bound time of snippet extraction
+WINDOW = 30  # number of tokens of each snippet
+
+
+class DocStoreWriter:
+    """
+    Doc Store Writer class writes text blocks and token offsets of docs in ascending doc no
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        makedirs(directory, exist_ok=True)
+        self.file = open(path.join(directory, STORE_FILE), "wb")
+        # for each doc: offset of its tokens, offsets of its text blocks and length of its text
+        self.records: list[(int, list[int], int)] = []
+
+    def add_doc(self, text: str, tokens: list[(int, int, str)]):
+        """
+        :param text: text of doc
+        :param tokens: list of (start, end, stemmed word) of doc
+        """
+        # positions of tokens of each term, so only positions of query terms are read for a snippet
+        term_positions: dict[str, list[int]] = {}
+        for i in range(len(tokens)):
+            term_positions.setdefault(tokens[i][2], []).append(i)
+
+        # positions of term j are positions[term_offsets[j]:term_offsets[j + 1]]
+        term_offsets = array('i', [0])
+        positions = array('i')
+        for p in term_positions.values():
+            positions.extend(p)
+            term_offsets.append(len(positions))
+        starts = array('i', [s for s, _, _ in tokens])
+        ends = array('i', [e for _, e, _ in tokens])
+
+        tokens_offset = self.file.tell()
+        self.file.write(zlib.compress(pickle.dumps((list(term_positions), term_offsets, positions, starts, ends),
+                                                   pickle.HIGHEST_PROTOCOL)))
+
+        blocks_offsets = []
+        for i in range(0, len(text), BLOCK_SIZE):
+            blocks_offsets.append(self.file.tell())
+            self.file.write(zlib.compress(text[i:i + BLOCK_SIZE].encode('utf-8')))
+        blocks_offsets.append(self.file.tell())  # end of last block
+
+        self.records.append((tokens_offset, blocks_offsets, len(text)))
+
+    def close(self):
+        self.file.close()
+        with open(path.join(self.directory, STORE_DICTIONARY_FILE), "wb") as f:
+            pickle.dump(self.records, f, pickle.HIGHEST_PROTOCOL)
+
+
+class DocStore:
+    """
+    Doc Store class reads tokens and only the needed text blocks of a doc
+    """
+
+    def __init__(self, directory: str):
+        with open(path.join(directory, STORE_DICTIONARY_FILE), "rb") as f:
+            self.records: list[(int, list[int], int)] = pickle.load(f)
+        self.file = open(path.join(directory, STORE_FILE), "rb")
+
+    def read_tokens(self, doc_no: int):
+        """
+        :return: terms of doc, offsets of positions of each term, positions of tokens of terms,
+        and start and end of each token
+        """
+        tokens_offset, blocks_offsets, _ = self.records[doc_no - 1]
+        self.file.seek(tokens_offset)
+
+        return pickle.loads(zlib.decompress(self.file.read(blocks_offsets[0] - tokens_offset)))
+
+    def read_text(self, doc_no: int, start: int, end: int):
+        """
+        decompresses only the blocks that contain characters start to end of doc
+        :return: text of doc from start to end
+        """
+        _, blocks_offsets, _ = self.records[doc_no - 1]
+        first_block = start // BLOCK_SIZE
+        last_block = min((end - 1) // BLOCK_SIZE, len(blocks_offsets) - 2)
+
+        self.file.seek(blocks_offsets[first_block])
+        data = self.file.read(blocks_offsets[last_block + 1] - blocks_offsets[first_block])
+
+        text = []
+        base = blocks_offsets[first_block]
+        for i in range(first_block, last_block + 1):
+            text.append(zlib.decompress(data[blocks_offsets[i] - base:blocks_offsets[i + 1] - base]).decode('utf-8'))
+
+        return "".join(text)[start - first_block * BLOCK_SIZE:end - first_block * BLOCK_SIZE]
+
+    def get_snippet(self, doc_no: int, query_terms: set[str], highlight=("\033[1m", "\033[0m")):
+        """
+        finds the window of WINDOW tokens that contains most distinct query terms and highlights query terms in it
+        :param query_terms: stemmed words of query
+        :param highlight: strings that are put before and after each query term
+        :return: snippet of doc
+        """
+        terms, term_offsets, positions, starts, ends = self.read_tokens(doc_no)
+        if len(starts) == 0:
+            return ""
+
+        # (position, term id) of first MAX_MATCHES tokens of query terms in order of position
+        query_ids = [j for j in range(len(terms)) if terms[j] in query_terms]
+        matches = list(islice(heapq.merge(*[zip(positions[term_offsets[j]:term_offsets[j + 1]], repeat(j))
+                                            for j in query_ids]), MAX_MATCHES))
+
+        # sliding window over matches; best window has most distinct query terms, then most matches
+        best = (0, 0, 0, 0)  # distinct terms, matches, first match and last match
+        counts: dict[int, int] = {}
+        left = 0
+        for right in range(len(matches)):
+            counts[matches[right][1]] = counts.get(matches[right][1], 0) + 1
+            while matches[right][0] - matches[left][0] >= WINDOW:
+                counts[matches[left][1]] -= 1
+                if counts[matches[left][1]] == 0:
+                    del counts[matches[left][1]]
+                left += 1
+
+            if (len(counts), right - left + 1) > best[:2]:
+                best = (len(counts), right - left + 1, matches[left][0], matches[right][0])
+
+        # window starts a few tokens before first match if last match still fits in it and doc is long enough
+        first = max(best[2] - WINDOW // 4, best[3] - WINDOW + 1)
+        first = max(0, min(first, len(starts) - WINDOW))
+        last = min(len(starts), first + WINDOW) - 1
+        highlighted = set()  # positions of query terms in the window
+        for j in query_ids:
+            lo = bisect_left(positions, first, term_offsets[j], term_offsets[j + 1])
+            hi = bisect_left(positions, last + 1, lo, term_offsets[j + 1])
+            highlighted.update(positions[lo:hi])
+
+        text = self.read_text(doc_no, starts[first], ends[last])
+        snippet = []
+        position = starts[first]
+        for i in range(first, last + 1):
+            if i in highlighted:
+                snippet.append(text[position - starts[first]:starts[i] - starts[first]])
+                snippet.append(highlight[0] + text[starts[i] - starts[first]:ends[i] - starts[first]] + highlight[1])
+                position = ends[i]
+        snippet.append(text[position - starts[first]:])
+
+        # replacing new lines and marking cut parts of doc
+        snippet = " ".join("".join(snippet).split())
+        if first > 0:
+            snippet = "... " + snippet
+        if ends[last] < self.records[doc_no - 1][2]:
+            snippet += " ..."
+
+        return snippet
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,87 @@
+""" Near-duplicate detection of docs with MinHash signatures of word shingles and LSH banding """
+from zlib import crc32
+
+SHINGLE_SIZE = 3  # number of stemmed words of each shingle
+BIN_BITS = 6
+NUM_HASHES = 1 << BIN_BITS  # length of signatures
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.8  # minimum estimated jaccard similarity of near-duplicate docs
+VALUE_BITS = 26  # hash of each shingle is 32 bits: BIN_BITS for its bin and VALUE_BITS for its value
+
+
+def get_signature(terms: list[str]):
+    """
+    calculates MinHash signature of shingles of a doc with one permutation hashing: hash of each shingle selects
+    one bin and each bin keeps its minimum value, so only one hash per shingle is calculated;
+    empty bins are filled by rotation from next non-empty bin
+    :param terms: stemmed words of doc
+    :return: signature of doc, None if doc has no words
+    """
+    if len(terms) == 0:
+        return None
+
+    empty = 1 << 32
+    bins = [empty] * NUM_HASHES
+    for i in range(max(1, len(terms) - SHINGLE_SIZE + 1)):
+        h = (crc32(" ".join(terms[i:i + SHINGLE_SIZE]).encode('utf-8')) * 0x9E3779B1) & 0xFFFFFFFF
+        b = h >> VALUE_BITS
+        v = h & ((1 << VALUE_BITS) - 1)
+        if v < bins[b]:
+            bins[b] = v
+
+    signature = list(bins)
+    for i in range(NUM_HASHES):
+        distance = 1
+        while signature[i] == empty:
+            j = (i + distance) % NUM_HASHES
+            if bins[j] != empty:
+                signature[i] = bins[j] + (distance << VALUE_BITS)
+            distance += 1
+
+    return signature
+
+
+def get_similarity(a: list[int], b: list[int]):
+    """
+    :return: estimated jaccard similarity of two docs from their signatures
+    """
+    return sum(1 for i in range(NUM_HASHES) if a[i] == b[i]) / NUM_HASHES
+
+
+class NearDuplicateDetector:
+    """
+    Near Duplicate Detector class finds near-duplicate docs while docs are indexed one by one;
+    first doc of each group of near-duplicates is kept and later ones are reported as its duplicates
+    """
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self.buckets: dict[(int, tuple), list[int]] = {}  # from (band, rows of signature in band) to kept docs
+        self.signatures: dict[int, list[int]] = {}  # signatures of kept docs
+        self.duplicates: dict[int, int] = {}  # from doc no of a duplicate to doc no of its kept doc
+
+    def add(self, doc_no: int, terms: list[str]):
+        """
+        :param doc_no: number of doc; docs must be added in ascending doc no
+        :param terms: stemmed words of doc
+        :return: doc no of an earlier doc that this doc is its near-duplicate, None if there is not any
+        """
+        signature = get_signature(terms)
+        if signature is None:
+            return None
+
+        bands = [(i, tuple(signature[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS)]
+
+        # docs that share a band with this doc are candidates
+        candidates = {d for b in bands for d in self.buckets.get(b, [])}
+        for c in sorted(candidates):
+            if get_similarity(signature, self.signatures[c]) >= self.threshold:
+                self.duplicates[doc_no] = c
+                return c
+
+        self.signatures[doc_no] = signature
+        for b in bands:
+            self.buckets.setdefault(b, []).append(doc_no)
+
+        return None
@@ -0,0 +1,187 @@
+""" Command line interface of the search engine: build, query, serve and bench subcommands """
+import argparse
+import sys
+from os import path
+
+# heavy modules are imported inside the subcommand that needs them to keep startup fast
+
+
+def print_results(result_arr: list[(float, int)], docs: list[str], snippets: list[str] = None):
+    """
+    prints name of result docs
+    :param result_arr: list of (similarity, doc no)
+    :param docs: address of all docs
+    :param snippets: snippet of each result doc (optional)
+    """
+    if len(result_arr) == 0:
+        print("چیزی پیدا نکردیم؛ لطفا کلمات جست‌وجوی خود را دقیق‌تر کنید یا کلمات بیش‌تری را به کار ببرید.")
+    else:
+        print("نتایج:")
+        for i in range(len(result_arr)):
+            print(path.basename(docs[result_arr[i][1] - 1])[:-4])
+            if snippets is not None:
+                print("    " + snippets[i])
+
+
+def read_queries(answer):
+    """
+    gets queries from user and answers them until user enters ۰۰۰
+    :param answer: function that gets a query and prints its results
+    """
+    while True:
+        q = input("\nعبارت مورد نظر خود برای جست‌وجو را وارد کنید (برای خروج ۰۰۰ (سه صفر) را وارد کیند):\n")
+        if q.__eq__("۰۰۰"):
+            return
+        answer(q)
+
+
+def get_snippets(index, q: str, result_arr: list[(float, int)]):
+    """
+    :param index: a DiskIndex
+    :return: snippet of each result doc; query terms are bold only on a terminal, so piped output has no escape codes
+    """
+    highlight = ("\033[1m", "\033[0m") if sys.stdout.isatty() else ("", "")
+    return [index.get_snippet(d, q, highlight) for _, d in result_arr]
+
+
+def build(args):
+    detector = None
+    if args.drop_duplicates:
+        from near_duplicates import NearDuplicateDetector
+
+        detector = NearDuplicateDetector()
+
+    if args.memory_budget is None:
+        from disk_index import build_index
+
+        docs_num = build_index(args.docs, args.index, detector)
+    else:
+        from spimi import build_index_spimi
+
+        docs_num = build_index_spimi(args.docs, args.index, int(args.memory_budget * 2 ** 20), detector)
+
+    print(docs_num, "docs are indexed in", args.index)
+    if detector is not None:
+        print(len(detector.duplicates), "near-duplicate docs are dropped")
+
+
+def query(args):
+    if args.batch is not None:
+        query_batch(args)
+        return
+
+    from disk_index import DiskIndex
+
+    index = DiskIndex(args.index)
+
+    def answer(q: str):
+        result_arr = index.search_daat(q, args.k, True) if args.conjunctive else index.search(q, args.k)
+        print_results(result_arr, index.docs, get_snippets(index, q, result_arr) if args.snippets else None)
+
+    try:
+        if len(args.q) > 0:
+            answer(" ".join(args.q))
+        else:
+            read_queries(answer)
+    finally:
+        index.close()
+
+
+def query_batch(args):
+    from disk_index import DiskIndex
+    from query_executor import QueryExecutor, wait_results
+
+    with open(args.batch, "r", encoding='utf-8') as f:
+        queries = [line.strip() for line in f if not line.strip() == ""]
+
+    executor = QueryExecutor(args.index, args.workers, args.processes)
+    try:
+        results = wait_results(executor.map(queries, args.k, args.timeout))
+    finally:
+        executor.close()
+
+    # threads share a loaded snapshot of index; only process workers have their own snapshots
+    index = executor.index if executor.index is not None else DiskIndex(args.index)
+    try:
+        for q, result_arr in zip(queries, results):
+            print("\n" + q)
+            if result_arr is None:
+                print("زمان جست‌وجو تمام شد.")
+            else:
+                print_results(result_arr, index.docs, get_snippets(index, q, result_arr) if args.snippets else None)
+    finally:
+        index.close()
+
+
+def serve(args):
+    from corpus import collect_docs
+    from shards import Coordinator
+
+    docs = collect_docs(args.docs)
+    coordinator = Coordinator(docs, args.shards, args.build_timeout)
+
+    def answer(q: str):
+        result_arr, missing = coordinator.query(q, args.k, args.timeout)
+        print_results(result_arr, docs)
+        if len(missing) > 0:
+            print("نتایج ناقص است؛ این بخش‌ها به موقع پاسخ ندادند:", *missing)
+
+    try:
+        read_queries(answer)
+    finally:
+        coordinator.close()
+
+
+def bench(args):
+    from bench import run_benchmarks
+
+    run_benchmarks(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="persian-search", description="Persian search engine")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="index docs and write the index to disk")
+    build_parser.add_argument("--docs", default="SampleDocs2", help="folder of docs")
+    build_parser.add_argument("--index", default="index", help="folder of index")
+    build_parser.add_argument("--memory-budget", type=float, help="build with SPIMI; maximum memory of postings in MB")
+    build_parser.add_argument("--drop-duplicates", action="store_true", help="do not index near-duplicates of docs")
+    build_parser.set_defaults(run=build)
+
+    query_parser = subparsers.add_parser("query", help="answer queries from a prebuilt index")
+    query_parser.add_argument("q", nargs="*", help="the query; queries are read from input if it is not given")
+    query_parser.add_argument("--index", default="index", help="folder of index")
+    query_parser.add_argument("-k", type=int, default=5, help="number of results")
+    query_parser.add_argument("--and", dest="conjunctive", action="store_true",
+                              help="only docs that include all of indexed query words are results")
+    query_parser.add_argument("--no-snippets", dest="snippets", action="store_false", help="print only name of docs")
+    query_parser.add_argument("--batch", help="file of queries (one query in each line) that are answered concurrently")
+    query_parser.add_argument("--workers", type=int, default=4, help="number of workers of batch queries")
+    query_parser.add_argument("--processes", action="store_true", help="use processes instead of threads as workers")
+    query_parser.add_argument("--timeout", type=float, help="seconds that each batch query must be answered in")
+    query_parser.set_defaults(run=query)
+
+    serve_parser = subparsers.add_parser("serve", help="answer queries from index shards in worker processes")
+    serve_parser.add_argument("--docs", default="SampleDocs2", help="folder of docs")
+    serve_parser.add_argument("--shards", type=int, default=4, help="number of shards")
+    serve_parser.add_argument("--timeout", type=float, default=1.0, help="seconds to wait for shards")
+    serve_parser.add_argument("--build-timeout", type=float, help="seconds to wait for shards to build their indexes")
+    serve_parser.add_argument("-k", type=int, default=5, help="number of results")
+    serve_parser.set_defaults(run=serve)
+
+    bench_parser = subparsers.add_parser("bench", help="run benchmarks")
+    bench_parser.add_argument("--docs", default="SampleDocs2", help="folder of docs")
+    bench_parser.add_argument("--index", default="index", help="folder of index; it is built if it does not exist")
+    bench_parser.add_argument("--runs", type=int, default=5, help="number of runs of each benchmark")
+    bench_parser.set_defaults(run=bench)
+
+    args = parser.parse_args()
+    # batch queries share a read-only snapshot that only term-at-a-time search uses
+    if args.command == "query" and args.conjunctive and args.batch is not None:
+        query_parser.error("argument --and: not allowed with argument --batch")
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+""" Concurrent evaluation of many queries on a thread or process pool that share a read-only index snapshot """
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from time import monotonic
+
+from disk_index import DiskIndex
+
+_index: DiskIndex = None  # snapshot of index in each worker process
+
+
+def load_snapshot(index_dir: str):
+    """
+    loads the whole index of index_dir as a read-only snapshot
+    """
+    index = DiskIndex(index_dir)
+    index.load_all()
+
+    return index
+
+
+def init_worker(index_dir: str):
+    """
+    loads snapshot of index once in each worker process
+    """
+    global _index
+    _index = load_snapshot(index_dir)
+
+
+def search_in_worker(q: str, k: int, deadline: float):
+    return search(_index, q, k, deadline)
+
+
+def search(index: DiskIndex, q: str, k: int, deadline: float):
+    """
+    evaluates a query unless its deadline is passed before it starts
+    :param deadline: time (as time.monotonic()) that query must be answered before it, None for no deadline
+    :return: list of k best (similarity, doc no)
+    """
+    if deadline is not None and monotonic() > deadline:
+        raise TimeoutError("deadline of query is passed before it starts")
+
+    return index.search(q, k, deadline)
+
+
+class QueryExecutor:
+    """
+    Query Executor class evaluates queries concurrently; threads share one snapshot of index and each process loads
+    its own snapshot, since pure python scoring holds the GIL and only processes run it in parallel
+    """
+
+    def __init__(self, index_dir: str, workers: int, use_processes: bool = False):
+        if use_processes:
+            self.index = None
+            self.pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(index_dir,))
+        else:
+            self.index = load_snapshot(index_dir)
+            self.pool = ThreadPoolExecutor(workers)
+
+    def submit(self, q: str, k: int, timeout: float = None):
+        """
+        :param q: the query
+        :param k: number of results
+        :param timeout: seconds from now that query must be answered in (optional);
+        result of a late query is TimeoutError; query can be cancelled by cancel() of its future before it starts
+        :return: future of list of k best (similarity, doc no)
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        if self.index is None:
+            return self.pool.submit(search_in_worker, q, k, deadline)
+
+        return self.pool.submit(search, self.index, q, k, deadline)
+
+    def map(self, queries: list[str], k: int, timeout: float = None):
+        """
+        evaluates queries concurrently
+        :param timeout: seconds from now that each query must be answered in (optional)
+        :return: futures of queries in order of queries
+        """
+        return [self.submit(q, k, timeout) for q in queries]
+
+    def close(self, cancel: bool = False):
+        """
+        stops workers
+        :param cancel: cancel queries that are not started
+        """
+        self.pool.shutdown(cancel_futures=cancel)
+
+
+def wait_results(futures: list[Future]):
+    """
+    waits for futures of queries
+    :return: result of each query in order; None for queries that are cancelled or missed their deadlines
+    """
+    results = []
+    for f in futures:
+        try:
+            results.append(f.result())
+        except (TimeoutError, CancelledError):
+            results.append(None)
+
+    return results
@@ -0,0 +1,164 @@
+""" Scatter-gather query execution over several index shards that are served by local worker processes """
+import heapq
+from itertools import islice
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from time import monotonic
+
+from corpus import calculate_norms, calculate_weights, count_terms, get_document_frequencies, get_query_weights, \
+    get_top_k, is_over_repeated, read_terms
+
+
+def serve_shard(conn: Connection, shard_docs: list[(int, str)]):
+    """
+    builds index of a shard and answers queries of coordinator until it receives None
+    first sends document frequencies of shard terms and waits for global document frequencies to calculate weights
+    :param conn: connection to coordinator
+    :param shard_docs: list of (doc no, address of doc) of this shard in ascending doc no
+    """
+    postings: dict[str, list[(int, int)]] = {}
+    for doc_no, doc in shard_docs:
+        count_terms(postings, doc_no, read_terms(doc))
+
+    conn.send(get_document_frequencies(postings))
+    df, docs_num = conn.recv()
+
+    weighted_postings = calculate_weights(postings, df, docs_num)
+    norms = calculate_norms(weighted_postings)
+    del postings
+    conn.send(None)  # shard is ready
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+
+        query_id, query_weights, k = message
+        conn.send((query_id, get_top_k(weighted_postings, norms, query_weights, k)))
+
+
+class Coordinator:
+    """
+    Coordinator class fans each query out to shard workers and merges their top-k lists
+    """
+
+    def __init__(self, docs: list[str], shards_num: int, build_timeout: float = None):
+        """
+        splits docs between shards (round robin) and builds shards with globally consistent idf;
+        RuntimeError is raised if a shard worker stops or does not build its index in time
+        :param docs: address of all docs; doc no of each doc is its index plus one
+        :param shards_num: number of shard worker processes
+        :param build_timeout: seconds to wait for shards to build their indexes (optional)
+        """
+        self.docs = docs
+        self.docs_num = len(docs)
+        self.query_id = 0
+        self.connections: list[Connection] = []
+        self.workers: list[Process] = []
+
+        doc_nos = list(enumerate(docs, 1))
+        for i in range(shards_num):
+            conn, worker_conn = Pipe()
+            worker = Process(target=serve_shard, args=(worker_conn, doc_nos[i::shards_num]), daemon=True)
+            worker.start()
+            worker_conn.close()
+            self.connections.append(conn)
+            self.workers.append(worker)
+
+        deadline = None if build_timeout is None else monotonic() + build_timeout
+        try:
+            # exchanging document frequencies
+            df: dict[str, int] = {}
+            for i in range(shards_num):
+                for t, n in self.receive_from_shard(i, deadline).items():
+                    df[t] = df.get(t, 0) + n
+
+            for conn in self.connections:
+                conn.send((df, self.docs_num))
+            for i in range(shards_num):
+                self.receive_from_shard(i, deadline)
+        except (RuntimeError, OSError):
+            for worker in self.workers:
+                worker.terminate()
+            raise
+
+        # dictionary of whole index after index elimination
+        self.df = {t: n for t, n in df.items() if not is_over_repeated(t, n, self.docs_num)}
+
+    def receive_from_shard(self, i: int, deadline: float):
+        """
+        receives a message of shard i while shards are built
+        :param deadline: time (as time.monotonic()) to wait for message until it, None to wait until worker stops
+        """
+        timeout = None if deadline is None else max(0.0, deadline - monotonic())
+        # sentinel of worker is ready when it stops, even if its end of pipe is not closed
+        ready = wait([self.connections[i], self.workers[i].sentinel], timeout)
+        if self.connections[i] not in ready:
+            if len(ready) == 0:
+                raise RuntimeError("shard %d did not build its index in time" % i)
+            raise RuntimeError("worker of shard %d stopped while building its index" % i)
+
+        try:
+            return self.connections[i].recv()
+        except EOFError:
+            raise RuntimeError("worker of shard %d stopped while building its index" % i) from None
+
+    def query(self, q: str, k: int, timeout: float):
+        """
+        sends query to all shards and merges answers that arrive before timeout
+        :param q: the query
+        :param k: number of results
+        :param timeout: seconds to wait for shards
+        :return: list of k best (similarity, doc no) and list of shards that did not answer in time
+        """
+        query_weights = get_query_weights(q, self.df, self.docs_num)
+        if len(query_weights) == 0:
+            return [], []
+
+        self.query_id += 1
+        waiting = []
+        for conn in self.connections:
+            try:
+                conn.send((self.query_id, query_weights, k))
+                waiting.append(conn)
+            except OSError:  # worker of shard is dead
+                pass
+
+        results = []
+        answered = []
+        deadline = monotonic() + timeout
+        while len(waiting) > 0 and monotonic() < deadline:
+            for conn in wait(waiting, deadline - monotonic()):
+                try:
+                    query_id, top_k = conn.recv()
+                except EOFError:  # worker of shard is dead
+                    waiting.remove(conn)
+                    continue
+
+                # answers of timed out queries are dropped
+                if query_id == self.query_id:
+                    results.append(top_k)
+                    answered.append(conn)
+                    waiting.remove(conn)
+
+        missing = [i for i in range(len(self.connections)) if self.connections[i] not in answered]
+
+        # k-way merge of sorted top-k lists of shards
+        merged = heapq.merge(*results, key=lambda x: (x[0], -x[1]), reverse=True)
+
+        return list(islice(merged, k)), missing
+
+    def close(self):
+        """
+        stops all shard workers
+        """
+        for conn in self.connections:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+
+        for worker in self.workers:
+            worker.join()
+
@@ -0,0 +1,149 @@
+""" Single-pass in-memory indexing (SPIMI) of corpora that are larger than memory """
+import heapq
+import pickle
+import sys
+from array import array
+from itertools import groupby
+from math import sqrt
+from os import path
+from tempfile import TemporaryDirectory, TemporaryFile
+from time import perf_counter
+
+from corpus import collect_docs, count_terms, get_weight, is_over_repeated, read_tokens
+from disk_index import POSTINGS_FILE, write_dictionary
+from doc_store import DocStoreWriter
+
+# approximate memory of python objects of postings; they are used to estimate memory of postings without measuring
+TERM_SIZE = 200  # a new term: its string, its postings list and its entry in dictionary
+POSTING_SIZE = 80  # a (doc no, tf) tuple and its place in postings list
+PROGRESS_INTERVAL = 1.0  # seconds between progress reports
+
+
+def write_run(directory: str, run_no: int, postings: dict[str, list[(int, int)]]):
+    """
+    writes postings sorted by term to a run file; postings of each term are written as arrays of doc nos and tfs
+    :return: address of run file
+    """
+    run = path.join(directory, "run" + str(run_no) + ".pickle")
+    with open(run, "wb") as f:
+        for t in sorted(postings):
+            doc_nos = array('i', [d for d, _ in postings[t]])
+            tfs = array('i', [tf for _, tf in postings[t]])
+            pickle.dump((t, doc_nos, tfs), f, pickle.HIGHEST_PROTOCOL)
+
+    return run
+
+
+def read_run(run: str):
+    """
+    reads (term, doc nos, tfs) of a run file one by one
+    """
+    with open(run, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def merge_runs(directory: str, runs: list[str], docs: list[str], docs_num: int):
+    """
+    k-way merges sorted runs into postings file of index and calculates idf, weights and norms during the merge;
+    postings of a term are streamed one run part at a time: doc nos are written while tfs are kept in a temporary
+    file, and weights are written from it when document frequency of term is known
+    :param runs: address of run files in ascending doc no
+    :param docs: address of all docs
+    :param docs_num: number of indexed docs (without near-duplicates)
+    """
+    df: dict[str, int] = {}
+    offsets: dict[str, int] = {}
+    sum_w2 = array('d', [0.0] * (len(docs) + 1))
+
+    # postings of a term in earlier runs come first since merge keeps order of runs for equal terms
+    merged = heapq.merge(*[read_run(r) for r in runs], key=lambda x: x[0])
+    with open(path.join(directory, POSTINGS_FILE), "wb") as f, TemporaryFile() as parts_file:
+        for t, parts in groupby(merged, key=lambda x: x[0]):
+            offset = f.tell()
+            parts_file.seek(0)
+            parts_lengths = []
+            for _, doc_nos, tfs in parts:
+                doc_nos.tofile(f)
+                doc_nos.tofile(parts_file)
+                tfs.tofile(parts_file)
+                parts_lengths.append(len(doc_nos))
+
+            n = sum(parts_lengths)
+            if is_over_repeated(t, n, docs_num):
+                f.seek(offset)
+                f.truncate()
+                continue
+
+            parts_file.seek(0)
+            for length in parts_lengths:
+                doc_nos = array('i')
+                tfs = array('i')
+                doc_nos.fromfile(parts_file, length)
+                tfs.fromfile(parts_file, length)
+
+                weights = array('d', [get_weight(tf, n, docs_num) for tf in tfs])
+                for i in range(length):
+                    sum_w2[doc_nos[i]] += weights[i] * weights[i]
+                weights.tofile(f)
+
+            df[t] = n
+            offsets[t] = offset
+
+    write_dictionary(directory, docs, docs_num, df, offsets, array('d', [sqrt(s) for s in sum_w2]))
+
+
+def build_index_spimi(docs_dir: str, directory: str, memory_budget: int, detector=None):
+    """
+    indexes docs of docs_dir with SPIMI; postings are flushed to a sorted run whenever their estimated memory reaches
+    memory_budget and runs are merged into the same index that build_index writes; the merge keeps only one run part
+    of a term of each run in memory.
+    only postings are bounded by memory_budget: list of docs, squares of norms (sum_w2), dictionary (df and offsets)
+    and records of doc store (DocStoreWriter.records) grow with the corpus outside the budget
+    :param memory_budget: maximum memory of postings in bytes
+    :param detector: a NearDuplicateDetector; near-duplicates of earlier docs are not indexed (optional)
+    :return: number of indexed docs
+    """
+    docs = collect_docs(docs_dir)
+    doc_store = DocStoreWriter(directory)
+
+    try:
+        with TemporaryDirectory(dir=directory) as runs_dir:
+            runs = []
+            postings: dict[str, list[(int, int)]] = {}
+            memory = 0
+
+            start = perf_counter()
+            last_report = start
+            for doc_no, doc in enumerate(docs, 1):
+                text, tokens = read_tokens(doc)
+                doc_store.add_doc(text, tokens)
+
+                terms = [t for _, _, t in tokens]
+                if detector is None or detector.add(doc_no, terms) is None:
+                    memory += sum(POSTING_SIZE if t in postings else TERM_SIZE + POSTING_SIZE for t in set(terms))
+                    count_terms(postings, doc_no, terms)
+
+                if memory >= memory_budget:
+                    runs.append(write_run(runs_dir, len(runs), postings))
+                    postings = {}
+                    memory = 0
+
+                if perf_counter() - last_report >= PROGRESS_INTERVAL or doc_no == len(docs):
+                    last_report = perf_counter()
+                    print("indexed %d/%d docs, %.1f docs/s, %d runs" %
+                          (doc_no, len(docs), doc_no / (last_report - start), len(runs)), file=sys.stderr)
+
+            if len(postings) > 0:
+                runs.append(write_run(runs_dir, len(runs), postings))
+            del postings
+
+            docs_num = len(docs) - (0 if detector is None else len(detector.duplicates))
+            merge_runs(directory, runs, docs, docs_num)
+    finally:
+        doc_store.close()
+
+    return docs_num
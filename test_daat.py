@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from corpus import calculate_norms, calculate_weights, count_terms, get_document_frequencies, get_top_k
+from daat import BLOCK_SIZE, TermBlocks, get_top_k_daat
+
+
+def create_random_index(docs_num: int, terms_num: int):
+    """
+    creates an index of random docs; frequent terms have many blocks of postings
+    :return: weighted postings and norms (indexed by doc no)
+    """
+    rand = random.Random(0)
+    terms = ["term" + str(i) for i in range(terms_num)]
+    frequencies = [1 / (i + 1) for i in range(terms_num)]
+
+    postings: dict[str, list[(int, int)]] = {}
+    for doc_no in range(1, docs_num + 1):
+        count_terms(postings, doc_no, rand.choices(terms, frequencies, k=rand.randint(5, 60)))
+
+    weighted_postings = calculate_weights(postings, get_document_frequencies(postings), docs_num)
+    norms = calculate_norms(weighted_postings)
+
+    return weighted_postings, [norms.get(d, 0.0) for d in range(docs_num + 1)]
+
+
+def test_daat_results_are_exact():
+    k = 10
+    weighted_postings, norms = create_random_index(3000, 300)
+    term_blocks = {t: TermBlocks(p, norms) for t, p in weighted_postings.items()}
+    assert sum(1 for p in weighted_postings.values() if len(p) > 4 * BLOCK_SIZE) > 20
+
+    rand = random.Random(1)
+    terms = sorted(weighted_postings)
+    for _ in range(200):
+        query_weights = {t: rand.uniform(1, 20) for t in rand.sample(terms, rand.randint(1, 4))}
+
+        expected = get_top_k(weighted_postings, norms, query_weights, k)
+        result_arr = get_top_k_daat(term_blocks, query_weights, k)
+        assert [d for _, d in result_arr] == [d for _, d in expected]
+        assert [s for s, _ in result_arr] == pytest.approx([s for s, _ in expected])
+
+        # exact conjunctive results are the best docs of exhaustive search that include all of query terms
+        docs = set.intersection(*(set(d for d, _ in weighted_postings[t]) for t in query_weights))
+        expected = [x for x in get_top_k(weighted_postings, norms, query_weights, len(norms)) if x[1] in docs][:k]
+        result_arr = get_top_k_daat(term_blocks, query_weights, k, True)
+        assert [d for _, d in result_arr] == [d for _, d in expected]
+        assert [s for s, _ in result_arr] == pytest.approx([s for s, _ in expected])
@@ -0,0 +1,54 @@
+from doc_store import MAX_MATCHES, DocStore, DocStoreWriter
+from corpus import stemming
+
+
+def get_snippet(directory: str, words: list[str], query: list[str]):
+    """
+    writes a doc of words to a doc store and makes its snippet for query
+    """
+    tokens = []
+    position = 0
+    for w in words:
+        tokens.append((position, position + len(w), stemming(w)))
+        position += len(w) + 1
+
+    writer = DocStoreWriter(directory)
+    writer.add_doc(" ".join(words), tokens)
+    writer.close()
+
+    store = DocStore(directory)
+    snippet = store.get_snippet(1, {stemming(w) for w in query}, ("[", "]"))
+    store.close()
+
+    return snippet
+
+
+def test_snippet_contains_all_matches_of_best_window(tmp_path):
+    words = ["کلمه" + str(i) for i in range(200)]
+    words[100] = "ریاضیات"
+    words[129] = "هندسه"
+
+    snippet = get_snippet(str(tmp_path), words, ["ریاضیات", "هندسه"])
+
+    assert "[ریاضیات]" in snippet
+    assert "[هندسه]" in snippet
+
+
+def test_snippet_contains_match_at_end_of_long_doc(tmp_path):
+    words = ["کلمه" + str(i) for i in range(12000)]
+    words[11000] = "ریاضیات"
+
+    snippet = get_snippet(str(tmp_path), words, ["ریاضیات"])
+
+    assert "[ریاضیات]" in snippet
+    assert "کلمه10999" in snippet
+
+
+def test_snippet_looks_at_first_matches_of_doc_with_many_matches(tmp_path):
+    words = ["ریاضیات" if i % 2 == 0 else "کلمه" + str(i) for i in range(4 * MAX_MATCHES)]
+    words[-2] = "هندسه"
+
+    snippet = get_snippet(str(tmp_path), words, ["ریاضیات", "هندسه"])
+
+    assert snippet.startswith("[ریاضیات]")
+    assert "[هندسه]" not in snippet
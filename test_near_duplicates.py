@@ -0,0 +1,43 @@
+import shutil
+
+from corpus import collect_docs, read_terms
+from disk_index import DiskIndex, build_index
+from near_duplicates import NearDuplicateDetector
+from spimi import build_index_spimi
+
+
+def test_detector_reports_copies_but_not_other_docs():
+    docs = collect_docs("SampleDocs2")
+    terms = read_terms(docs[0])
+    edited = list(terms)
+    for i in range(0, len(edited), 100):
+        edited[i] = "ویرایش"
+
+    detector = NearDuplicateDetector()
+    assert detector.add(1, terms) is None
+    assert detector.add(2, list(terms)) == 1
+    assert detector.add(3, edited) == 1
+    assert detector.add(4, read_terms(docs[-1])) is None
+    assert detector.add(5, terms[:len(terms) // 2]) is None
+    assert detector.duplicates == {2: 1, 3: 1}
+
+
+def test_near_duplicates_are_not_counted_in_index(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    docs = collect_docs("SampleDocs1")[:20]
+    for i in range(len(docs)):
+        shutil.copy(docs[i], docs_dir / (str(i + 1) + ".txt"))
+    shutil.copy(docs[0], docs_dir / "21.txt")
+
+    assert build_index(str(docs_dir), str(tmp_path / "memory"), NearDuplicateDetector()) == 20
+    assert build_index_spimi(str(docs_dir), str(tmp_path / "spimi"), 10000, NearDuplicateDetector()) == 20
+
+    # the dropped doc keeps its doc no but it is not counted in number of docs for idf
+    for directory in [tmp_path / "memory", tmp_path / "spimi"]:
+        index = DiskIndex(str(directory))
+        assert index.docs_num == 20
+        assert len(index.docs) == 21
+        assert len(index.norms) == 22
+        assert index.norms[21] == 0.0
+        index.close()
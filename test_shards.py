@@ -0,0 +1,40 @@
+import pytest
+
+from corpus import collect_docs, create_index, get_query_weights, get_top_k
+from shards import Coordinator
+
+QUERIES = ["تاریخ ایران باستان", "ریاضیات هندسه", "بیماری قلب", "فیزیک کوانتوم انرژی"]
+
+
+def test_coordinator():
+    docs = collect_docs("SampleDocs1")
+    docs_num, df, weighted_postings, norms = create_index(docs)
+
+    coordinator = Coordinator(docs, 3)
+    try:
+        # merged top-k of shards is the same as top-k of one index
+        for q in QUERIES:
+            result_arr, missing = coordinator.query(q, 5, 10.0)
+            expected = get_top_k(weighted_postings, norms, get_query_weights(q, df, docs_num), 5)
+            assert [d for _, d in result_arr] == [d for _, d in expected]
+            assert [s for s, _ in result_arr] == pytest.approx([s for s, _ in expected])
+            assert missing == []
+
+        # no shard can answer in zero seconds
+        assert coordinator.query(QUERIES[0], 5, 0)[1] == [0, 1, 2]
+
+        coordinator.workers[1].kill()
+        coordinator.workers[1].join()
+        result_arr, missing = coordinator.query(QUERIES[0], 5, 10.0)
+        assert missing == [1]
+        assert len(result_arr) > 0
+    finally:
+        coordinator.close()
+
+
+def test_coordinator_reports_shard_that_stops_while_building():
+    docs = collect_docs("SampleDocs1")
+    docs[4] = "SampleDocs1/missing.txt"  # worker of shard 1 stops when it reads this doc
+
+    with pytest.raises(RuntimeError, match="shard 1"):
+        Coordinator(docs, 3)
@@ -0,0 +1,24 @@
+import pytest
+
+from disk_index import DiskIndex, build_index
+from spimi import build_index_spimi
+
+
+def test_spimi_index_is_same_as_in_memory_index(tmp_path, capsys):
+    build_index("SampleDocs1", str(tmp_path / "memory"))
+    build_index_spimi("SampleDocs1", str(tmp_path / "spimi"), 50000)
+    # last progress report: indexed N/N docs, X docs/s, R runs
+    assert int(capsys.readouterr().err.split()[-2]) > 1
+
+    memory_index = DiskIndex(str(tmp_path / "memory"))
+    spimi_index = DiskIndex(str(tmp_path / "spimi"))
+    try:
+        assert spimi_index.docs_num == memory_index.docs_num
+        assert spimi_index.docs == memory_index.docs
+        assert spimi_index.df == memory_index.df
+        for t in memory_index.df:
+            assert spimi_index.get_postings(t) == memory_index.get_postings(t)
+        assert list(spimi_index.norms) == pytest.approx(list(memory_index.norms), abs=1e-9)
+    finally:
+        memory_index.close()
+        spimi_index.close()